@@ -1,122 +1,233 @@
 import gradio as gr
-import requests
+import httpx
+import orjson
+import asyncio
 import os
+import time
+from html import escape as _esc
+from operator import itemgetter
 from dotenv import load_dotenv
-from logger import ui_logger
+from logger import get_logger
 
-# Load environment variables
-load_dotenv()
-ui_logger.info("Environment variables loaded")
+ui_logger = get_logger("ui")
+
+# Load environment variables only when launched as a script; importers configure their own env
+if __name__ == "__main__":
+    load_dotenv()
+    ui_logger.info("Environment variables loaded")
 
 # API URL (default to localhost when running locally)
-API_URL = os.getenv("API_URL", "http://localhost:8000")
-ui_logger.info(f"Using API URL: {API_URL}")
+API_URL = os.environ.get("API_URL", "http://localhost:8000")
+ui_logger.info("Using API URL: %s", API_URL)
+
+# Endpoint paths, resolved against API_URL by the shared client
+_URL_RECOMMEND = "/recommend"
+_URL_ASSESSMENTS = "/assessments"
+
+# Shared async HTTP/2 client so concurrent users multiplex over kept-alive connections
+ASYNC_CLIENT = httpx.AsyncClient(
+    base_url=API_URL,
+    timeout=httpx.Timeout(30.0, connect=3.05),
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=3,  # Connection failures only; gateway errors are retried below
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+    )
+)
+
+# Explicit timeouts so a hung backend releases the handler instead of holding it forever
+RECOMMEND_TIMEOUT = httpx.Timeout(30.0, connect=3.05)
+CATALOG_TIMEOUT = httpx.Timeout(60.0, connect=3.05)
+
+# Transient gateway errors are retried with exponential backoff
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = frozenset((502, 503, 504))
+
+async def _send_with_retry(method, url, **kwargs):
+    """Send a request on the shared client, retrying transient gateway errors"""
+    for attempt in range(RETRY_TOTAL + 1):
+        response = await ASYNC_CLIENT.request(method, url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+            return response
+        delay = RETRY_BACKOFF * 2 ** attempt
+        ui_logger.warning("%s %s returned %d, retrying in %.1fs", method, url, response.status_code, delay)
+        await asyncio.sleep(delay)
+
+# Table styles, loaded once with the page and scoped to the output component
+_ASSESSMENT_CSS = """
+#assessment-output table {
+    border-collapse: collapse;
+    width: 100%;
+    margin-top: 20px;
+}
+#assessment-output th, #assessment-output td {
+    border: 1px solid #ddd;
+    padding: 8px;
+    text-align: left;
+}
+#assessment-output th {
+    background-color: #f2f2f2;
+    font-weight: bold;
+}
+#assessment-output tr:nth-child(even) {
+    background-color: #f9f9f9;
+}
+#assessment-output a {
+    color: #0366d6;
+    text-decoration: none;
+}
+#assessment-output a:hover {
+    text-decoration: underline;
+}
+"""
+
+# Static table markup, built once at import instead of on every call
+_TABLE_HEADER = (
+    "<table><tr>"
+    "<th>Assessment Name</th>"
+    "<th>Remote Testing</th>"
+    "<th>Adaptive/IRT Support</th>"
+    "<th>Duration</th>"
+    "<th>Test Type</th>"
+    "</tr>"
+)
+
+_TABLE_FOOTER = "</table>"
+
+_RECOMMENDATION_NOTE = (
+    '<div style="margin-top: 20px; font-size: 14px; color: #666;">'
+    "<p>These assessments are recommended based on the job description provided. "
+    "Click on the assessment name to learn more about each assessment on the SHL website.</p>"
+    "</div>"
+)
+
+# Shown as soon as a handler starts so the user sees progress while the API responds
+_LOADING_HTML = '<p style="margin-top: 20px; color: #666;">Loading assessments...</p>'
+
+# Indexed by bool so the flag columns need no branching
+_YN = ("No", "Yes")
+
+# Every assessment is padded with these so the row fields can be fetched in one C call
+_DEFAULTS = {
+    "name": "",
+    "url": "",
+    "remote_testing": False,
+    "adaptive_support": False,
+    "duration": "",
+    "test_type": ""
+}
+_GET = itemgetter("name", "url", "remote_testing", "adaptive_support", "duration", "test_type")
+
+# Bound format_map of a fixed row template, so each row is a single call with no per-row f-string
+_ROW_TMPL = (
+    '<tr><td><a href="{url}" target="_blank">{name}</a></td>'
+    "<td>{remote}</td>"
+    "<td>{adaptive}</td>"
+    "<td>{duration}</td>"
+    "<td>{test_type}</td></tr>"
+).format_map
 
-def recommend_assessments(text_input, url_input):
-    """Function to call the FastAPI endpoint and display results"""
+def _norm(assessment):
+    """Turn an API assessment into escaped, display-ready row fields"""
+    name, url, remote, adaptive, duration, test_type = _GET({**_DEFAULTS, **assessment})
+    return {
+        "name": _esc(name),
+        "url": _esc(url, quote=True),
+        "remote": _YN[bool(remote)],
+        "adaptive": _YN[bool(adaptive)],
+        "duration": _esc(str(duration)),
+        "test_type": _esc(str(test_type))
+    }
+
+def _render_assessment_table(items, heading=""):
+    """Render assessments as an HTML table, optionally preceded by a heading"""
+    body = "".join(_ROW_TMPL(_norm(a)) for a in items)
+    heading_html = f"<h3>{_esc(heading)}</h3>" if heading else ""
+    return heading_html + _TABLE_HEADER + body + _TABLE_FOOTER
+
+# Rendered catalog table, served stale-while-revalidate since the catalog rarely changes
+MAX_AGE = 60  # Seconds the cached table is served as fresh
+SWR = 300     # Further seconds a stale table is served while refreshing in the background
+_CACHE = {"html": None, "ts": 0.0, "task": None}
+
+async def _refresh_assessments():
+    """Fetch all assessments, render them and swap the result into the cache"""
+    ui_logger.info("Requesting all assessments")
+    response = await _send_with_retry("GET", _URL_ASSESSMENTS, timeout=CATALOG_TIMEOUT)
+    response.raise_for_status()
+    result = orjson.loads(response.content)
+    assessments = result.get("assessments", [])
+    
+    ui_logger.info("Received %d assessments", len(assessments))
+    
+    html_output = _render_assessment_table(assessments, heading="All Available SHL Assessments")
+    _CACHE.update(html=html_output, ts=time.time())
+    return html_output
+
+def _refresh_task():
+    """Return the in-flight catalog refresh, starting one only if none is running"""
+    task = _CACHE["task"]
+    if task is None or task.done():
+        task = _CACHE["task"] = asyncio.create_task(_refresh_assessments())
+        task.add_done_callback(_log_refresh_failure)
+    return task
+
+def _log_refresh_failure(task):
+    """Log a failed refresh, since background refreshes are never awaited"""
+    if not task.cancelled() and task.exception() is not None:
+        ui_logger.error("Refresh of assessments failed: %s", task.exception())
+
+async def recommend_assessments(text_input, url_input):
+    """Function to call the FastAPI endpoint and stream results to the UI"""
     if not text_input and not url_input:
         ui_logger.warning("Request with no text or URL provided")
-        return "Please provide either a job description text or a URL."
+        yield "Please provide either a job description text or a URL."
+        return
     
     # Prepare request data
     data = {}
     if text_input:
-        ui_logger.info(f"Processing text input (length: {len(text_input)})")
+        ui_logger.info("Processing text input (length: %d)", len(text_input))
         data["text"] = text_input
     if url_input:
-        ui_logger.info(f"Processing URL input: {url_input}")
+        ui_logger.info("Processing URL input: %s", url_input)
         data["url"] = url_input
     
+    yield _LOADING_HTML
+    
     try:
         # Call FastAPI endpoint
-        ui_logger.debug(f"Sending request to {API_URL}/recommend")
-        response = requests.post(f"{API_URL}/recommend", json=data)
+        ui_logger.debug("Sending request to %s%s", API_URL, _URL_RECOMMEND)
+        response = await _send_with_retry(
+            "POST",
+            _URL_RECOMMEND,
+            content=orjson.dumps(data),
+            headers={"content-type": "application/json"},
+            timeout=RECOMMEND_TIMEOUT
+        )
         response.raise_for_status()
         
         # Process results
-        results = response.json()
+        results = orjson.loads(response.content)
         recommendations = results.get("recommendations", [])
         
         if not recommendations:
             ui_logger.warning("No recommendations received")
-            return "No relevant assessments found. Please try a more detailed job description."
+            yield "No relevant assessments found. Please try a more detailed job description."
+            return
         
-        ui_logger.info(f"Received {len(recommendations)} recommendations")
+        ui_logger.info("Received %d recommendations", len(recommendations))
         
         # Format output as HTML table
-        html_output = """
-        <style>
-        table {
-            border-collapse: collapse;
-            width: 100%;
-            margin-top: 20px;
-        }
-        th, td {
-            border: 1px solid #ddd;
-            padding: 8px;
-            text-align: left;
-        }
-        th {
-            background-color: #f2f2f2;
-            font-weight: bold;
-        }
-        tr:nth-child(even) {
-            background-color: #f9f9f9;
-        }
-        a {
-            color: #0366d6;
-            text-decoration: none;
-        }
-        a:hover {
-            text-decoration: underline;
-        }
-        </style>
-        <table>
-            <tr>
-                <th>Assessment Name</th>
-                <th>Remote Testing</th>
-                <th>Adaptive/IRT Support</th>
-                <th>Duration</th>
-                <th>Test Type</th>
-            </tr>
-        """
-        
-        for assessment in recommendations:
-            name = assessment.get("name", "")
-            url = assessment.get("url", "")
-            remote = "Yes" if assessment.get("remote_testing", False) else "No"
-            adaptive = "Yes" if assessment.get("adaptive_support", False) else "No"
-            duration = assessment.get("duration", "")
-            test_type = assessment.get("test_type", "")
-            
-            html_output += f"""
-            <tr>
-                <td><a href="{url}" target="_blank">{name}</a></td>
-                <td>{remote}</td>
-                <td>{adaptive}</td>
-                <td>{duration}</td>
-                <td>{test_type}</td>
-            </tr>
-            """
-        
-        html_output += "</table>"
-        
-        # Add explanation below the table
-        html_output += """
-        <div style="margin-top: 20px; font-size: 14px; color: #666;">
-            <p>These assessments are recommended based on the job description provided. 
-            Click on the assessment name to learn more about each assessment on the SHL website.</p>
-        </div>
-        """
-        
-        return html_output
+        yield _render_assessment_table(recommendations) + _RECOMMENDATION_NOTE
     
     except Exception as e:
-        ui_logger.error(f"Error in recommend_assessments: {str(e)}")
-        return f"Error: {str(e)}"
+        ui_logger.error("Error in recommend_assessments: %s", e)
+        yield f"Error: {str(e)}"
 
 # Create Gradio interface
-with gr.Blocks(title="SHL Assessment Recommender", theme=gr.themes.Base()) as demo:
+with gr.Blocks(title="SHL Assessment Recommender", theme=gr.themes.Base(), css=_ASSESSMENT_CSS) as demo:
     gr.Markdown("# SHL Assessment Recommender")
     gr.Markdown("Enter a job description or provide a URL to get relevant SHL assessment recommendations.")
     
@@ -135,7 +246,7 @@ with gr.Blocks(title="SHL Assessment Recommender", theme=gr.themes.Base()) as de
                 submit_btn = gr.Button("Get Recommendations", variant="primary")
                 view_all_btn = gr.Button("View All Assessments", variant="secondary")
     
-    output = gr.HTML(label="Recommendations")
+    output = gr.HTML(label="Recommendations", elem_id="assessment-output")
     
     submit_btn.click(
         fn=recommend_assessments,
@@ -143,79 +254,27 @@ with gr.Blocks(title="SHL Assessment Recommender", theme=gr.themes.Base()) as de
         outputs=output
     )
     
-    def view_all_assessments():
+    async def view_all_assessments():
         try:
-            ui_logger.info("Requesting all assessments")
-            response = requests.get(f"{API_URL}/assessments")
-            response.raise_for_status()
-            result = response.json()
-            assessments = result.get("assessments", [])
-            
-            ui_logger.info(f"Received {len(assessments)} assessments")
-            
-            # Format all assessments as HTML table
-            html_output = """
-            <style>
-            table {
-                border-collapse: collapse;
-                width: 100%;
-                margin-top: 20px;
-            }
-            th, td {
-                border: 1px solid #ddd;
-                padding: 8px;
-                text-align: left;
-            }
-            th {
-                background-color: #f2f2f2;
-                font-weight: bold;
-            }
-            tr:nth-child(even) {
-                background-color: #f9f9f9;
-            }
-            a {
-                color: #0366d6;
-                text-decoration: none;
-            }
-            a:hover {
-                text-decoration: underline;
-            }
-            </style>
-            <h3>All Available SHL Assessments</h3>
-            <table>
-                <tr>
-                    <th>Assessment Name</th>
-                    <th>Remote Testing</th>
-                    <th>Adaptive/IRT Support</th>
-                    <th>Duration</th>
-                    <th>Test Type</th>
-                </tr>
-            """
+            age = time.time() - _CACHE["ts"]
+            if _CACHE["html"] is not None and age < MAX_AGE:
+                ui_logger.info("Serving cached assessments")
+                yield _CACHE["html"]
+                return
             
-            for assessment in assessments:
-                name = assessment.get("name", "")
-                url = assessment.get("url", "")
-                remote = "Yes" if assessment.get("remote_testing", False) else "No"
-                adaptive = "Yes" if assessment.get("adaptive_support", False) else "No"
-                duration = assessment.get("duration", "")
-                test_type = assessment.get("test_type", "")
-                
-                html_output += f"""
-                <tr>
-                    <td><a href="{url}" target="_blank">{name}</a></td>
-                    <td>{remote}</td>
-                    <td>{adaptive}</td>
-                    <td>{duration}</td>
-                    <td>{test_type}</td>
-                </tr>
-                """
+            if _CACHE["html"] is not None and age < MAX_AGE + SWR:
+                ui_logger.info("Serving stale assessments while refreshing")
+                _refresh_task()
+                yield _CACHE["html"]
+                return
             
-            html_output += "</table>"
-            return html_output
+            yield _LOADING_HTML
+            # Concurrent cold clicks share one fetch; shielded so a closed tab doesn't cancel it for the others
+            yield await asyncio.shield(_refresh_task())
             
         except Exception as e:
-            ui_logger.error(f"Error in view_all_assessments: {str(e)}")
-            return f"Error: {str(e)}"
+            ui_logger.error("Error in view_all_assessments: %s", e)
+            yield f"Error: {str(e)}"
     
     view_all_btn.click(
         fn=view_all_assessments,
@@ -226,5 +285,9 @@ with gr.Blocks(title="SHL Assessment Recommender", theme=gr.themes.Base()) as de
 if __name__ == "__main__":
     ui_logger.info("Starting Gradio UI")
     # demo.launch()
+    # Bound concurrent handlers and queue depth so bursts of users don't all hit the API at once
+    demo.queue(default_concurrency_limit=8, max_size=100)
     demo.launch(server_name="0.0.0.0", server_port=7860)
+    # ASYNC_CLIENT's connections belong to Gradio's event loop, which is gone once launch returns;
+    # closing them from a new loop would fail, so they are left for process exit to release
     ui_logger.info("Gradio UI stopped")
@@ -1,28 +1,33 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 # Create logs directory if it doesn't exist
 logs_dir = Path("logs")
 logs_dir.mkdir(exist_ok=True)
 
+# Rotating file handlers can't be shared between processes, so each API worker gets its own files
+_PER_PROCESS_FILES = int(os.getenv("API_WORKERS", "1")) > 1
+
 # Configure the logging settings
 def setup_logger(name, log_file, level=logging.INFO):
-    """Function to set up a logger with file and console handlers"""
+    """Function to set up a logger whose file and console handlers run on a background thread"""
     # Create a custom logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
     # Create handlers
     # File handler for persistent logging
-    # file_handler = RotatingFileHandler(
-    #     os.path.join(logs_dir, log_file), 
-    #     maxBytes=10485760,  # 10MB
-    #     backupCount=5,      # Keep 5 backup logs
-    #     encoding='utf-8'
-    # )
-    # file_handler.setLevel(level)
+    file_handler = RotatingFileHandler(
+        os.path.join(logs_dir, log_file), 
+        maxBytes=10485760,  # 10MB
+        backupCount=5,      # Keep 5 backup logs
+        encoding='utf-8'
+    )
+    file_handler.setLevel(level)
     
     # Console handler for immediate feedback
     console_handler = logging.StreamHandler()
@@ -36,19 +41,35 @@ def setup_logger(name, log_file, level=logging.INFO):
         '%(asctime)s - %(levelname)s - %(message)s'
     )
     
-    # file_handler.setFormatter(file_format)
+    file_handler.setFormatter(file_format)
     console_handler.setFormatter(console_format)
     
-    # Add handlers to the logger
-    # logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Hand the real handlers to a listener thread so logging calls only enqueue records
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # Add the queue handler to the logger
+    logger.addHandler(QueueHandler(log_queue))
     
     return logger
 
-# Create loggers for different components
-api_logger = setup_logger('api', 'api.log')
-scraper_logger = setup_logger('scraper', 'scraper.log')
-ui_logger = setup_logger('ui', 'ui.log')
+# Loggers built so far, keyed by component name
+_loggers = {}
+
+def get_logger(name):
+    """Return the logger for a component, creating its handlers on first use"""
+    if name not in _loggers:
+        log_file = f'{name}.{os.getpid()}.log' if _PER_PROCESS_FILES else f'{name}.log'
+        _loggers[name] = setup_logger(name, log_file)
+    return _loggers[name]
+
+# Module-level logger names kept for existing imports, resolved lazily by __getattr__
+_LEGACY_LOGGERS = frozenset(("api_logger", "scraper_logger", "ui_logger", "app_logger"))
 
-# General application logger
-app_logger = setup_logger('app', 'app.log')
+def __getattr__(name):
+    """Resolve the legacy api_logger/scraper_logger/ui_logger/app_logger names lazily"""
+    if name in _LEGACY_LOGGERS:
+        return get_logger(name[:-len('_logger')])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,20 +1,32 @@
 import os
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import uvicorn
 import google.generativeai as genai
 from dotenv import load_dotenv
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from selectolax.parser import HTMLParser
 import re
-import json
+from urllib.parse import urlsplit, urlunsplit
+import orjson
 import time
 import asyncio
+import hashlib
+import random
+import errno
+import shutil
+import tempfile
 from pathlib import Path
 import firecrawl  # Import the module without specifying a class
-from logger import api_logger, scraper_logger, app_logger
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from logger import get_logger
+
+api_logger = get_logger("api")
+scraper_logger = get_logger("scraper")
+app_logger = get_logger("app")
 
 # Load environment variables
 load_dotenv()
@@ -32,6 +44,9 @@ if not FIRECRAWL_API_KEY:
     app_logger.error("FIRECRAWL_API_KEY not found in environment variables")
     raise ValueError("FIRECRAWL_API_KEY not found in environment variables")
 
+# Firecrawl REST endpoint, called directly for batch jobs over a shared keepalive client
+FIRECRAWL_API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev")
+
 # Initialize Firecrawl client properly
 firecrawl_client = firecrawl.FirecrawlApp(api_key=FIRECRAWL_API_KEY)
 app_logger.info("Firecrawl API initialized")
@@ -53,21 +68,54 @@ app.add_middleware(
 )
 app_logger.info("CORS middleware added")
 
+# Shared HTTP client for fallback page fetches, so connections are reused across requests
+@app.on_event("startup")
+async def open_http_client():
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        follow_redirects=True
+    )
+    # The Firecrawl SDK opens a new connection per call, so batch jobs go through this client instead
+    app.state.firecrawl_http = httpx.AsyncClient(
+        base_url=FIRECRAWL_API_URL,
+        headers={"Authorization": f"Bearer {FIRECRAWL_API_KEY}"},
+        transport=httpx.AsyncHTTPTransport(
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        ),
+        timeout=httpx.Timeout(60.0, connect=10.0)
+    )
+    app_logger.info("HTTP client opened")
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await app.state.http.aclose()
+    await app.state.firecrawl_http.aclose()
+    app_logger.info("HTTP client closed")
+
 # Cache file path
 CACHE_FILE = Path("shl_assessments_cache.json")
 CACHE_EXPIRY = 86400  # Cache expiry in seconds (24 hours)
 
+# Regex patterns used on every scraped page and response
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+_NON_WORD_RE = re.compile(r'\W+')
+
 # Add logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
     response = await call_next(request)
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
+    # Lazy %-formatting: the message is only built if the level is enabled, and the
+    # queue handler from setup_logger keeps the file write off the event loop
     api_logger.info(
-        f"Path: {request.url.path} | "
-        f"Method: {request.method} | "
-        f"Status: {response.status_code} | "
-        f"Processing time: {process_time:.4f}s"
+        "Path: %s | Method: %s | Status: %d | Processing time: %.4fs",
+        request.url.path,
+        request.method,
+        response.status_code,
+        process_time
     )
     return response
 
@@ -94,15 +142,408 @@ class SHLAssessmentSchema(BaseModel):
     duration: str = Field(description="Duration of the assessment (e.g. '10-15 minutes')")
     test_type: str = Field(description="Type of assessment (e.g. 'Cognitive ability', 'Personality assessment')")
 
+# Product URLs per Firecrawl batch job, seconds between job status polls, and the most seconds to wait for a job
+FIRECRAWL_BATCH_SIZE = int(os.getenv("FIRECRAWL_BATCH_SIZE", "10"))
+FIRECRAWL_POLL_INTERVAL = 2
+FIRECRAWL_BATCH_TIMEOUT = float(os.getenv("FIRECRAWL_BATCH_TIMEOUT", "300"))
+
+def _is_rate_limited(error):
+    """Whether an API error looks like an HTTP 429 / rate-limit response"""
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message
+
+# Concurrency caps and retry policy for the third-party APIs
+_FIRECRAWL_SEM = asyncio.Semaphore(int(os.getenv("FIRECRAWL_CONCURRENCY", "2")))
+_GEMINI_SEM = asyncio.Semaphore(int(os.getenv("GEMINI_CONCURRENCY", "8")))
+MAX_RETRIES = 3
+BASE_DELAY = 1.0  # Seconds, doubled on every retry
+MIN_PAGE_TEXT = 200  # Pages shorter than this are treated as a soft rate limit
+
+async def _firecrawl_scrape(url, min_text=MIN_PAGE_TEXT, **params):
+    """Scrape a URL with Firecrawl, retrying rate limits and near-empty pages with exponential backoff"""
+    for attempt in range(MAX_RETRIES):
+        last_attempt = attempt == MAX_RETRIES - 1
+        try:
+            # Only the call holds a slot; backoff sleeps below leave it free for other scrapes and polls
+            async with _FIRECRAWL_SEM:
+                result = await firecrawl_client.scrape_async(url=url, **params)
+        except Exception as e:
+            if not _is_rate_limited(e) or last_attempt:
+                raise
+            scraper_logger.warning(f"Firecrawl rate limited for {url} (attempt {attempt + 1})")
+        else:
+            if len(result.get("text", "")) >= min_text or last_attempt:
+                return result
+            scraper_logger.warning(f"Firecrawl returned near-empty content for {url} (attempt {attempt + 1})")
+        await asyncio.sleep(BASE_DELAY * 2 ** attempt)
+
+async def _gemini_generate(prompt, **kwargs):
+    """Call Gemini, retrying rate-limit errors with exponential backoff"""
+    for attempt in range(MAX_RETRIES):
+        try:
+            async with _GEMINI_SEM:
+                return await model.generate_content_async(prompt, **kwargs)
+        except Exception as e:
+            if not _is_rate_limited(e) or attempt == MAX_RETRIES - 1:
+                raise
+            app_logger.warning(f"Gemini rate limited (attempt {attempt + 1})")
+        await asyncio.sleep(BASE_DELAY * 2 ** attempt)
+
+async def _firecrawl_request(method, url, **kwargs):
+    """Call the Firecrawl REST API on the shared keepalive client, returning the decoded JSON body"""
+    async with _FIRECRAWL_SEM:
+        response = await app.state.firecrawl_http.request(method, url, **kwargs)
+    response.raise_for_status()  # A 429 surfaces as an error mentioning the status, caught by _is_rate_limited
+    return orjson.loads(response.content)
+
+async def _firecrawl_poll(url):
+    """GET a Firecrawl job resource, retrying rate limits in place so the job is never resubmitted"""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await _firecrawl_request("GET", url)
+        except Exception as e:
+            if not _is_rate_limited(e) or attempt == MAX_RETRIES - 1:
+                raise
+            scraper_logger.warning(f"Firecrawl status poll rate limited (attempt {attempt + 1})")
+        await asyncio.sleep(BASE_DELAY * 2 ** attempt)
+
+async def _batch_scrape_status(job_id):
+    """Fetch a Firecrawl batch job's status, collecting every page of results once it completes"""
+    status = await _firecrawl_poll(f"/v1/batch/scrape/{job_id}")
+    if status.get("status") == "completed":
+        data = list(status.get("data", []))
+        next_url = status.get("next")
+        while next_url:
+            page = await _firecrawl_poll(next_url)
+            data.extend(page.get("data", []))
+            next_url = page.get("next")
+        status["data"] = data
+    return status
+
+async def _submit_batch_scrape(urls):
+    """Start a Firecrawl batch job for the URLs, returning its id"""
+    job = await _firecrawl_request(
+        "POST",
+        "/v1/batch/scrape",
+        content=orjson.dumps({"urls": urls, "formats": ["markdown", "links"], "onlyMainContent": True}),
+        headers={"content-type": "application/json"}
+    )
+    return job["id"]
+
+async def _collect_batch_scrape(job_id):
+    """Wait for a Firecrawl batch job, returning (text, title) keyed by source URL"""
+    # Stalled or cancelled jobs raise, so the caller fetches those pages individually
+    deadline = time.monotonic() + FIRECRAWL_BATCH_TIMEOUT
+    while True:
+        status = await _batch_scrape_status(job_id)
+        state = status.get("status")
+        if state == "completed":
+            break
+        if state != "scraping":
+            raise RuntimeError(f"Firecrawl batch job {job_id} ended with status {state!r}")
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Firecrawl batch job {job_id} still scraping after {FIRECRAWL_BATCH_TIMEOUT:.0f}s")
+        await asyncio.sleep(FIRECRAWL_POLL_INTERVAL)
+    
+    pages = {}
+    for document in status.get("data", []):
+        metadata = document.get("metadata", {})
+        source_url = metadata.get("sourceURL") or metadata.get("url")
+        if source_url:
+            pages[_normalize_url(source_url)] = (document.get("markdown", ""), metadata.get("title", ""))
+    return pages
+
+async def _batch_scrape(urls, batch_size=FIRECRAWL_BATCH_SIZE):
+    """Scrape URLs through Firecrawl batch jobs, splitting batches further when submission is rate limited"""
+    pages = {}
+    for start in range(0, len(urls), batch_size):
+        chunk = urls[start:start + batch_size]
+        try:
+            job_id = await _submit_batch_scrape(chunk)
+        except Exception as e:
+            # Only a rejected submission is split and resubmitted; no job was started for it
+            if _is_rate_limited(e) and batch_size > 1:
+                scraper_logger.warning(f"Firecrawl batch rate limited, retrying in batches of {batch_size // 2}")
+                await asyncio.sleep(FIRECRAWL_POLL_INTERVAL)
+                pages.update(await _batch_scrape(chunk, batch_size // 2))
+            else:
+                scraper_logger.error(f"Firecrawl batch submission failed: {str(e)}")
+            continue
+        
+        try:
+            pages.update(await _collect_batch_scrape(job_id))
+        except Exception as e:
+            # The job may still be running and billed, so its pages are fetched individually rather than resubmitted
+            scraper_logger.error(f"Firecrawl batch job {job_id} failed: {str(e)}")
+    return pages
+
+# HTML parsing is CPU-bound, so these run in the default executor to keep the event loop free
+def _parse_page(html):
+    """Parse a product page into its text and title"""
+    tree = HTMLParser(html)
+    # Prefer the main content over navigation and footer chrome
+    content = tree.css_first('main') or tree.css_first('article') or tree.body
+    page_text = content.text(separator=' ', strip=True) if content else ""
+    title = tree.css_first('title')
+    page_title = title.text(strip=True) if title else ""
+    return page_text, page_title
+
+def _extract_links(html):
+    """Return every href on a page"""
+    tree = HTMLParser(html)
+    return [node.attributes.get('href') or '' for node in tree.css('a[href]')]
+
+def _extract_text(html):
+    """Extract the visible text of a web page, dropping scripts and styles"""
+    tree = HTMLParser(html)
+    tree.strip_tags(['script', 'style'])
+    return tree.body.text(separator=' ', strip=True) if tree.body else ""
+
+async def _fetch_page(url):
+    """Fetch a single product page's text and title, via Firecrawl or a plain HTTP fallback"""
+    # Small jitter so concurrent tasks don't hit shl.com in lockstep
+    await asyncio.sleep(random.uniform(0, 0.1))
+    scraper_logger.debug(f"Scraping product page: {url}")
+    
+    try:
+        # Try using Firecrawl
+        result = await _firecrawl_scrape(
+            url,
+            extract_text=True,
+            extract_metadata=True
+        )
+        
+        page_text = result.get("text", "")
+        page_title = result.get("metadata", {}).get("title", "")
+        
+    except Exception as e:
+        scraper_logger.error(f"Firecrawl error for {url}: {str(e)}")
+        # Fallback to traditional request
+        response = await app.state.http.get(url)
+        loop = asyncio.get_running_loop()
+        page_text, page_title = await loop.run_in_executor(None, _parse_page, response.text)
+    
+    return page_text, page_title
+
+# URL segments that name a section of the site rather than a product
+_NON_PRODUCT_SEGMENTS = frozenset(("home", "solutions", "products", "assessments", "view"))
+
+# Category names for URLs whose slug doesn't yield a product name, checked in order
+_CATEGORY_NAMES = (
+    ("personality", "Personality Assessment"),
+    ("cognitive", "Cognitive Assessment"),
+    ("skills", "Skills Assessment"),
+    ("video-interview", "Video Interview Assessment"),
+    ("360", "360 Feedback Assessment")
+)
+
+def _derive_name_from_url(url, test_type=None):
+    """Derive a readable product name from a URL slug, falling back to its category"""
+    for part in reversed(urlsplit(url).path.split('/')):
+        if part and part.lower() not in _NON_PRODUCT_SEGMENTS:
+            # Convert slug to readable name; one pass turns hyphens, punctuation and space runs into single spaces
+            product_name = _NON_WORD_RE.sub(' ', part.replace("%20", " ")).strip()
+            if product_name:
+                return product_name.title()
+            break
+    
+    lowered = url.lower()
+    for keyword, category in _CATEGORY_NAMES:
+        if keyword in lowered:
+            return category
+    
+    # Last resort
+    return f"SHL Assessment - {test_type}" if test_type else "SHL Assessment"
+
+async def _scrape_one(url, sem, scraped=None):
+    """Name a product page from batch results or a fresh fetch, returning its name and text or None on failure"""
+    async with sem:
+        try:
+            if scraped:
+                page_text, page_title = scraped
+            else:
+                page_text, page_title = await _fetch_page(url)
+            
+            # Get product name with improved fallback logic
+            name = None
+            
+            # Try to get from title
+            if page_title:
+                # Remove common suffixes from title
+                name = page_title.replace(" | SHL", "").replace("SHL |", "").replace("SHL", "").strip()
+            
+            # Fall back to the URL path when the title is empty or just names a section
+            if not name or name.lower() in _NON_PRODUCT_SEGMENTS:
+                name = _derive_name_from_url(url)
+            
+            scraper_logger.debug(f"Extracted name: '{name}' from URL: {url}")
+            
+            # Gemini classification happens afterwards, batched across all scraped pages
+            return {"name": name, "url": url, "content": page_text[:GEMINI_CONTENT_CHARS]}
+            
+        except Exception as e:
+            # Log error but let the other URLs carry on
+            scraper_logger.error(f"Error scraping {url}: {str(e)}")
+            return None
+
+# Gemini batching limits: pages per prompt, page text sent per page and a rough
+# input-token budget per prompt (estimated at ~4 characters per token)
+GEMINI_BATCH_SIZE = 32
+GEMINI_CONTENT_CHARS = 2000
+GEMINI_BATCH_TOKEN_BUDGET = 100000
+
+# Details assumed when Gemini's answer can't be parsed
+DEFAULT_ASSESSMENT_DETAILS = {
+    "remote_testing": True,
+    "adaptive_support": False,
+    "duration": "20-30 minutes",
+    "test_type": "Assessment"
+}
+
+async def _classify_page(page):
+    """Extract assessment details for a single page with its own Gemini call"""
+    url = page["url"]
+    content = page["content"]
+    
+    # Use Gemini to analyze the product page content
+    prompt = f"""
+    Analyze this SHL assessment product page content and extract the following information:
+    
+    Content: {content}
+    
+    URL: {url}
+    
+    Extract:
+    1. Remote testing availability (true/false)
+    2. Does it use adaptive/IRT technology (true/false)
+    3. Duration (e.g., "15-20 minutes")
+    4. Test type (e.g., "Cognitive ability", "Personality assessment")
+    
+    If information is not available, make a reasonable assumption.
+    Return response as JSON with keys: remote_testing (boolean), adaptive_support (boolean), duration (string), test_type (string)
+    """
+    
+    response = await _gemini_generate(prompt)
+    
+    # Parse the JSON response from Gemini
+    try:
+        # Try to extract JSON from the response
+        json_text = _JSON_RE.search(response.text)
+        if json_text:
+            return orjson.loads(json_text.group(0))
+    except Exception as e:
+        scraper_logger.error(f"Failed to parse Gemini response for {url}: {str(e)}")
+    
+    # Fallback if no JSON found or parsing fails
+    return dict(DEFAULT_ASSESSMENT_DETAILS)
+
+def _batch_pages(pages):
+    """Split pages into Gemini batches bounded by item count and estimated tokens"""
+    batch = []
+    batch_tokens = 0
+    for page in pages:
+        page_tokens = len(page["content"]) // 4
+        if batch and (len(batch) >= GEMINI_BATCH_SIZE or batch_tokens + page_tokens > GEMINI_BATCH_TOKEN_BUDGET):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(page)
+        batch_tokens += page_tokens
+    if batch:
+        yield batch
+
+async def _classify_batch(batch):
+    """Extract assessment details for a batch of pages with one Gemini call, keyed by batch index"""
+    items = [
+        {"id": i, "url": page["url"], "content": page["content"]}
+        for i, page in enumerate(batch)
+    ]
+    
+    prompt = f"""
+    Analyze each of the following SHL assessment product pages and extract, for every item:
+    1. Remote testing availability (true/false)
+    2. Does it use adaptive/IRT technology (true/false)
+    3. Duration (e.g., "15-20 minutes")
+    4. Test type (e.g., "Cognitive ability", "Personality assessment")
+    
+    Items:
+    {orjson.dumps(items).decode()}
+    
+    If information is not available, make a reasonable assumption.
+    Return ONLY a JSON array with one object per item, with keys: id (integer), remote_testing (boolean), adaptive_support (boolean), duration (string), test_type (string)
+    """
+    
+    try:
+        response = await _gemini_generate(prompt)
+        text = response.text.strip()
+        
+        # Strip markdown code fences around the array
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1] if "\n" in text else ""
+            text = text.rsplit("```", 1)[0]
+        
+        results = orjson.loads(text)
+    except Exception as e:
+        scraper_logger.error(f"Batched Gemini classification failed: {str(e)}")
+        return {}
+    
+    if not isinstance(results, list):
+        scraper_logger.error("Batched Gemini classification did not return a JSON array")
+        return {}
+    
+    return {r["id"]: r for r in results if isinstance(r, dict) and isinstance(r.get("id"), int)}
+
+async def _classify_pages(pages):
+    """Turn scraped pages into assessments, batching Gemini calls and retrying misses one by one"""
+    batches = list(_batch_pages(pages))
+    scraper_logger.info(f"Classifying {len(pages)} pages in {len(batches)} Gemini batches")
+    batch_results = await asyncio.gather(*[_classify_batch(batch) for batch in batches])
+    
+    details = []
+    for batch, batch_details in zip(batches, batch_results):
+        details.extend(batch_details.get(i) for i in range(len(batch)))
+    
+    # Fall back to per-page calls for anything the batches didn't cover
+    missing = [i for i, d in enumerate(details) if d is None]
+    if missing:
+        scraper_logger.warning(f"{len(missing)} pages missing from batched results, classifying individually")
+        fallback_results = await asyncio.gather(*[_classify_page(pages[i]) for i in missing], return_exceptions=True)
+        for i, result in zip(missing, fallback_results):
+            if isinstance(result, Exception):
+                scraper_logger.error(f"Error classifying {pages[i]['url']}: {str(result)}")
+            else:
+                details[i] = result
+    
+    assessments = []
+    for page, assessment_details in zip(pages, details):
+        if assessment_details is None:
+            continue
+        
+        # Create the assessment object
+        assessments.append({
+            "name": page["name"],
+            "url": page["url"],
+            "remote_testing": assessment_details.get("remote_testing", True),
+            "adaptive_support": assessment_details.get("adaptive_support", False),
+            "duration": assessment_details.get("duration", "20-30 minutes"),
+            "test_type": assessment_details.get("test_type", "Assessment")
+        })
+        scraper_logger.debug(f"Added assessment: {page['name']}")
+    
+    return assessments
+
+def _normalize_url(url):
+    """Canonical form of a URL: lowercase scheme and host, no trailing slash, query or fragment"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), '', ''))
+
 async def scrape_shl_assessments():
     """Scrape SHL assessment data using Firecrawl"""
     
     scraper_logger.info("Starting SHL assessment scraping")
     
-    # SHL product pages to scrape
-    shl_urls = [
-        "https://www.shl.com/solutions/products/", 
-    ]
+    # SHL product pages to scrape, keyed by normalized URL so variants of one page are scraped once
+    shl_url_set = {_normalize_url("https://www.shl.com/solutions/products/")}
     
     assessments = []
     
@@ -112,8 +553,9 @@ async def scrape_shl_assessments():
         
         # Use the correct Firecrawl API method
         try:
-            main_page_result = await firecrawl_client.scrape_async(
-                url="https://www.shl.com/solutions/products/",
+            main_page_result = await _firecrawl_scrape(
+                "https://www.shl.com/solutions/products/",
+                min_text=0,
                 extract_links=True
             )
             
@@ -122,154 +564,49 @@ async def scrape_shl_assessments():
             
             # Add product links to our list
             for link in links:
-                if isinstance(link, str) and 'products' in link and link not in shl_urls:
+                if isinstance(link, str) and 'products' in link:
                     # Only add links that look like product pages
                     if '/products/' in link and not link.endswith('/products/'):
-                        shl_urls.append(link)
+                        shl_url_set.add(_normalize_url(link))
             
         except Exception as e:
             scraper_logger.error(f"Error scraping main page: {str(e)}")
             # Fallback: use traditional request if Firecrawl fails
             try:
-                response = requests.get("https://www.shl.com/solutions/products/")
-                soup = BeautifulSoup(response.text, 'html.parser')
-                for a in soup.find_all('a', href=True):
-                    link = a['href']
-                    if '/products/' in link and not link.endswith('/products/') and link not in shl_urls:
+                response = await app.state.http.get("https://www.shl.com/solutions/products/")
+                loop = asyncio.get_running_loop()
+                for link in await loop.run_in_executor(None, _extract_links, response.text):
+                    if '/products/' in link and not link.endswith('/products/'):
                         # Ensure URL is absolute
                         if not link.startswith('http'):
                             link = 'https://www.shl.com' + link if not link.startswith('/') else 'https://www.shl.com' + link
-                        shl_urls.append(link)
+                        shl_url_set.add(_normalize_url(link))
             except Exception as e2:
                 scraper_logger.error(f"Fallback scraping also failed: {str(e2)}")
         
+        shl_urls = sorted(shl_url_set)
         scraper_logger.info(f"Found {len(shl_urls)} product URLs to scrape")
         
-        # Now scrape each product page
-        for url in shl_urls:
-            try:
-                # Scrape the product page with appropriate method
-                scraper_logger.debug(f"Scraping product page: {url}")
-                
-                try:
-                    # Try using Firecrawl
-                    result = await firecrawl_client.scrape_async(
-                        url=url,
-                        extract_text=True,
-                        extract_metadata=True
-                    )
-                    
-                    page_text = result.get("text", "")
-                    page_title = result.get("metadata", {}).get("title", "")
-                    
-                except Exception as e:
-                    scraper_logger.error(f"Firecrawl error for {url}: {str(e)}")
-                    # Fallback to traditional request
-                    response = requests.get(url)
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    page_text = soup.get_text(separator=' ', strip=True)
-                    page_title = soup.title.string if soup.title else ""
-                
-                # Get product name with improved fallback logic
-                name = None
-                
-                # Try to get from title
-                if page_title:
-                    # Remove common suffixes from title
-                    name = page_title.replace(" | SHL", "").replace("SHL |", "").replace("SHL", "").strip()
-                
-                # Try to extract from the URL path if still empty
-                if not name or name == "":
-                    url_parts = url.rstrip('/').split('/')
-                    # Get the last non-empty segment of the URL
-                    for part in reversed(url_parts):
-                        if part and part != "solutions" and part != "products":
-                            # Convert slug to readable name
-                            product_name = part.replace("-", " ").replace("%20", " ").strip()
-                            name = product_name.title()
-                            break
-                
-                # Final fallback: check if the URL indicates a specific product category
-                if not name or name == "" or name.lower() in ["home", "solutions", "products", "assessments"]:
-                    if "personality" in url.lower():
-                        name = "Personality Assessment"
-                    elif "cognitive" in url.lower():
-                        name = "Cognitive Assessment"
-                    elif "skills" in url.lower():
-                        name = "Skills Assessment"
-                    elif "video-interviews" in url.lower():
-                        name = "Video Interview Assessment"
-                    elif "360" in url.lower():
-                        name = "360 Feedback Assessment"
-                    else:
-                        # Last resort
-                        name = "SHL Assessment"
-                        
-                scraper_logger.debug(f"Extracted name: '{name}' from URL: {url}")
-                
-                # Use Gemini to extract structured information about the assessment
-                content = page_text
-                
-                # Use Gemini to analyze the product page content
-                prompt = f"""
-                Analyze this SHL assessment product page content and extract the following information:
-                
-                Content: {content}
-                
-                URL: {url}
-                
-                Extract:
-                1. Remote testing availability (true/false)
-                2. Does it use adaptive/IRT technology (true/false)
-                3. Duration (e.g., "15-20 minutes")
-                4. Test type (e.g., "Cognitive ability", "Personality assessment")
-                
-                If information is not available, make a reasonable assumption.
-                Return response as JSON with keys: remote_testing (boolean), adaptive_support (boolean), duration (string), test_type (string)
-                """
-                
-                response = model.generate_content(prompt)
-                
-                # Parse the JSON response from Gemini
-                try:
-                    # Try to extract JSON from the response
-                    json_text = re.search(r'({.*})', response.text, re.DOTALL)
-                    if json_text:
-                        assessment_details = json.loads(json_text.group(1))
-                    else:
-                        # Fallback if no JSON found
-                        assessment_details = {
-                            "remote_testing": True,
-                            "adaptive_support": False,
-                            "duration": "20-30 minutes",
-                            "test_type": "Assessment"
-                        }
-                except Exception as e:
-                    # Fallback if JSON parsing fails
-                    assessment_details = {
-                        "remote_testing": True,
-                        "adaptive_support": False,
-                        "duration": "20-30 minutes",
-                        "test_type": "Assessment"
-                    }
-                
-                # Create the assessment object
-                assessment = {
-                    "name": name,
-                    "url": url,
-                    "remote_testing": assessment_details.get("remote_testing", True),
-                    "adaptive_support": assessment_details.get("adaptive_support", False),
-                    "duration": assessment_details.get("duration", "20-30 minutes"),
-                    "test_type": assessment_details.get("test_type", "Assessment")
-                }
-                
-                # Add to our list of assessments
-                assessments.append(assessment)
-                scraper_logger.debug(f"Added assessment: {name}")
-                
-            except Exception as e:
-                # Log error but continue with other URLs
-                scraper_logger.error(f"Error scraping {url}: {str(e)}")
+        # Scrape the product pages through Firecrawl batch jobs first
+        scraped_pages = await _batch_scrape(shl_urls)
+        scraper_logger.info(f"Firecrawl batch scrape returned {len(scraped_pages)} pages")
+        
+        # Then fetch anything the batches missed concurrently, bounded so shl.com isn't hammered
+        sem = asyncio.Semaphore(int(os.getenv("SHL_SCRAPE_CONCURRENCY", "8")))
+        results = await asyncio.gather(
+            *[_scrape_one(url, sem, scraped_pages.get(url)) for url in shl_urls],
+            return_exceptions=True
+        )
+        
+        pages = []
+        for url, result in zip(shl_urls, results):
+            if isinstance(result, Exception):
+                scraper_logger.error(f"Error scraping {url}: {str(result)}")
+            elif result:
+                pages.append(result)
+        
+        # Classify every scraped page with as few Gemini calls as possible
+        assessments = await _classify_pages(pages)
     
     except Exception as e:
         # Log the error but don't fail completely
@@ -297,95 +634,268 @@ async def scrape_shl_assessments():
             }
         ]
     
-    # Make sure we don't have duplicate URLs and ensure all assessments have valid names
-    unique_assessments = []
-    seen_urls = set()
-    
+    # URLs were de-duplicated before scraping; just make sure every assessment has a valid name
     for assessment in assessments:
-        if assessment["url"] not in seen_urls:
-            # Ensure assessment has valid name
-            if not assessment["name"] or assessment["name"] == "Unknown Product":
-                # Try to derive name from the URL as a fallback
-                url_parts = assessment["url"].rstrip('/').split('/')
-                for part in reversed(url_parts):
-                    if part and part != "solutions" and part != "products" and part not in seen_urls:
-                        # Convert slug to readable name
-                        product_name = part.replace("-", " ").replace("%20", " ").strip()
-                        assessment["name"] = product_name.title()
-                        break
-                
-                # If still no name, assign a default
-                if not assessment["name"] or assessment["name"] == "Unknown Product":
-                    assessment["name"] = "SHL Assessment - " + assessment["test_type"]
-            
-            seen_urls.add(assessment["url"])
-            unique_assessments.append(assessment)
+        if not assessment["name"] or assessment["name"] == "Unknown Product":
+            assessment["name"] = _derive_name_from_url(assessment["url"], assessment["test_type"])
     
-    scraper_logger.info(f"Scraping completed. Found {len(unique_assessments)} unique assessments")
-    return unique_assessments
+    scraper_logger.info(f"Scraping completed. Found {len(assessments)} unique assessments")
+    return assessments
 
-async def fetch_shl_assessments_async():
-    """Async version of fetch_shl_assessments that properly handles async operations"""
-    
-    # Check if cached data exists and is not expired
-    if CACHE_FILE.exists():
+def _read_cache_file():
+    """Load the cache file, returning None if it is missing or unreadable"""
+    if not CACHE_FILE.exists():
+        return None
+    try:
+        return orjson.loads(CACHE_FILE.read_bytes())
+    except Exception as e:
+        api_logger.error(f"Error reading cache: {str(e)}")
+        return None
+
+def _replace_file(path, write):
+    """Write a file through a unique temp file renamed into place, so readers never see a half-written file"""
+    # A unique name per write keeps concurrent workers from interleaving into the same temp file
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            write(tmp_file)
         try:
-            with open(CACHE_FILE, 'r') as f:
-                cache_data = json.load(f)
-                
-            # Check if cache is still valid
-            timestamp = cache_data.get('timestamp', 0)
-            current_time = time.time()
-            
-            if current_time - timestamp < CACHE_EXPIRY:
-                api_logger.info("Using cached assessment data")
-                return cache_data.get('assessments', [])
-            else:
-                api_logger.info("Cache expired, fetching fresh data")
-        except Exception as e:
-            api_logger.error(f"Error reading cache: {str(e)}")
-            # If there's any error reading the cache, ignore and proceed
+            os.replace(tmp_name, path)
+        except OSError as e:
+            if e.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+            # A single-file bind mount (as in docker-compose) can't be renamed over, so write it in place
+            with open(tmp_name, "rb") as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    finally:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
             pass
-    else:
-        api_logger.info("No cache found, fetching fresh data")
-    
-    # If we reach here, we need to scrape fresh data
-    # Properly await the async function
-    assessments = await scrape_shl_assessments()
-    
-    # Save to cache
+
+def _write_cache_file(cache_data):
+    """Write the cache file, atomically wherever the filesystem allows it"""
+    data = orjson.dumps(cache_data)
+    _replace_file(CACHE_FILE, lambda f: f.write(data))
+
+def _cache_file_mtime():
+    """Modification time of the cache file in nanoseconds, or None if it doesn't exist"""
+    try:
+        return CACHE_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def _get_assessments_cache():
+    """Return the in-memory assessment cache, reloading it when another worker has rewritten the file"""
+    cache_data = getattr(app.state, "assessments_cache", None)
+    # A stat per call keeps API workers coherent without re-parsing the file on every request
+    mtime = _cache_file_mtime()
+    if mtime is not None and mtime != getattr(app.state, "assessments_cache_mtime", None):
+        disk_data = _read_cache_file()
+        # Skip unreadable files and files older than memory (e.g. while this worker's own write is in flight)
+        if disk_data is not None and (cache_data is None or disk_data.get('timestamp', 0) >= cache_data.get('timestamp', 0)):
+            cache_data = disk_data
+            app.state.assessments_cache = disk_data
+            app.state.assessments_cache_mtime = mtime
+    return cache_data
+
+async def _save_assessments_cache(assessments):
+    """Swap fresh assessments into memory, then persist them off the event loop"""
     cache_data = {
         'timestamp': time.time(),
         'assessments': assessments
     }
+    app.state.assessments_cache = cache_data
     
     try:
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(cache_data, f)
+        await asyncio.to_thread(_write_cache_file, cache_data)
         api_logger.info("Assessment data cached successfully")
     except Exception as e:
         api_logger.error(f"Error writing cache: {str(e)}")
+    # Memory now matches the file as written, so only another worker's write triggers a reload
+    app.state.assessments_cache_mtime = _cache_file_mtime()
     
-    return assessments
+    return cache_data
+
+@app.on_event("startup")
+async def load_assessments_cache():
+    app.state.assessments_cache = None
+    _get_assessments_cache()
+    app_logger.info("Assessment cache loaded" if app.state.assessments_cache else "No assessment cache on disk")
+
+# Embedding retrieval: assessments are recalled by cosine similarity before Gemini reranks them
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDINGS_FILE = Path("shl_assessments_embeddings.npz")
+RETRIEVAL_TOP_K = 20
+
+def _assessment_text(assessment):
+    """Text embedded for an assessment"""
+    return f"{assessment['name']} {assessment['test_type']}"
+
+def _quantize(vectors):
+    """Quantize vectors to int8 with a per-row scale, returning (int8 values, float32 scales)"""
+    scales = np.max(np.abs(vectors), axis=-1, keepdims=True) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales).astype(np.int8), scales.astype(np.float32)
+
+def _load_embeddings(timestamp, count):
+    """Load persisted (int8 vectors, scales) if they were computed for this cache version"""
+    if not EMBEDDINGS_FILE.exists():
+        return None
+    try:
+        # Arrays are read out inside the with block so the archive's file handle is closed
+        with np.load(EMBEDDINGS_FILE) as data:
+            if float(data['timestamp']) == timestamp and len(data['qvectors']) == count:
+                return data['qvectors'], data['scales']
+    except Exception as e:
+        app_logger.error(f"Error reading embeddings: {str(e)}")
+    return None
+
+def _compute_embeddings(assessments, timestamp):
+    """Encode assessments into int8-quantized vectors and persist them next to the JSON cache"""
+    vectors = app.state.encoder.encode(
+        [_assessment_text(a) for a in assessments],
+        normalize_embeddings=True
+    )
+    qvectors, scales = _quantize(vectors)
+    
+    # Vectors for a catalog older than the current cache (a request still on an old snapshot) stay in memory only,
+    # so workers sharing the file never overwrite the current catalog's vectors with stale ones
+    current = getattr(app.state, "assessments_cache", None) or {}
+    if current.get('timestamp', 0) > timestamp:
+        return qvectors, scales
+    
+    try:
+        # Through a temp file, so another worker never loads a half-written archive
+        _replace_file(
+            EMBEDDINGS_FILE,
+            lambda f: np.savez(f, timestamp=timestamp, qvectors=qvectors, scales=scales)
+        )
+    except Exception as e:
+        app_logger.error(f"Error writing embeddings: {str(e)}")
+    return qvectors, scales
+
+# Serializes loading/encoding so concurrent requests after a refresh encode the catalog once
+_vectors_lock = asyncio.Lock()
+
+async def _get_assessment_vectors(cache_data):
+    """Return (int8 vectors, scales) for the cached assessments, loading or computing them when the cache changes"""
+    timestamp = cache_data.get('timestamp', 0)
+    assessments = cache_data.get('assessments', [])
+    
+    if getattr(app.state, "assessment_vectors_timestamp", None) == timestamp:
+        return app.state.assessment_vectors
+    
+    async with _vectors_lock:
+        # Another request may have produced these vectors while this one waited
+        if getattr(app.state, "assessment_vectors_timestamp", None) == timestamp:
+            return app.state.assessment_vectors
+        
+        vectors = await asyncio.to_thread(_load_embeddings, timestamp, len(assessments))
+        if vectors is None:
+            app_logger.info(f"Computing embeddings for {len(assessments)} assessments")
+            vectors = await asyncio.to_thread(_compute_embeddings, assessments, timestamp)
+        
+        app.state.assessment_vectors = vectors
+        app.state.assessment_vectors_timestamp = timestamp
+        return vectors
+
+@app.on_event("startup")
+async def load_encoder():
+    app.state.encoder = await asyncio.to_thread(SentenceTransformer, EMBEDDING_MODEL)
+    app_logger.info(f"Embedding model {EMBEDDING_MODEL} loaded")
+    
+    # Warm the vectors for the cache loaded from disk so the first request doesn't pay for them
+    cache_data = getattr(app.state, "assessments_cache", None)
+    if cache_data:
+        await _get_assessment_vectors(cache_data)
+
+async def _retrieve_candidates(query_text, cache_data):
+    """Return the indices of the assessments most similar to the query, best first"""
+    qvectors, scales = await _get_assessment_vectors(cache_data)
+    query_vector = await asyncio.to_thread(app.state.encoder.encode, query_text, normalize_embeddings=True)
+    
+    # Integer dot products rank the same as float32; the query's own scale is constant so it's dropped
+    qquery, _ = _quantize(query_vector)
+    scores = (qvectors.astype(np.int32) @ qquery.astype(np.int32)) * scales.ravel()
+    
+    k = min(RETRIEVAL_TOP_K, len(scores))
+    if k < len(scores):
+        top = np.argpartition(-scores, k)[:k]
+    else:
+        top = np.arange(len(scores))
+    return [int(i) for i in top[np.argsort(-scores[top])]]
+
+# A cold or expired cache is refreshed by one shared scrape that concurrent requests all await
+_refresh_lock = asyncio.Lock()
+_refresh_task = None
+
+def _fresh_cache_data():
+    """Return the cache if it is still within the cache expiry, else None"""
+    # Goes through the file check, so a refresh another worker already wrote is adopted instead of re-scraped
+    cache_data = _get_assessments_cache()
+    if cache_data is not None and time.time() - cache_data.get('timestamp', 0) < CACHE_EXPIRY:
+        return cache_data
+    return None
+
+async def _scrape_and_cache():
+    """Scrape the SHL catalog and save the result as the new cache"""
+    assessments = await scrape_shl_assessments()
+    return await _save_assessments_cache(assessments)
+
+async def _refresh_assessments_once(force=False):
+    """Scrape and cache fresh assessments, joining a scrape that is already running, and return the new cache"""
+    global _refresh_task
+    async with _refresh_lock:
+        # Another request, or another worker, may have finished refreshing while this one waited
+        cache_data = None if force else _fresh_cache_data()
+        if cache_data is not None:
+            return cache_data
+        if _refresh_task is None or _refresh_task.done():
+            _refresh_task = asyncio.create_task(_scrape_and_cache())
+        task = _refresh_task
+    # Shielded so a disconnecting client doesn't cancel the scrape the others are waiting on
+    return await asyncio.shield(task)
+
+async def _fetch_assessments_cache():
+    """Return a valid cache snapshot ({'timestamp', 'assessments'}), scraping fresh data when it has expired"""
+    
+    # Check if cached data exists and is not expired
+    cache_data = _get_assessments_cache()
+    if cache_data is not None:
+        # Check if cache is still valid
+        timestamp = cache_data.get('timestamp', 0)
+        current_time = time.time()
+        
+        if current_time - timestamp < CACHE_EXPIRY:
+            api_logger.info("Using cached assessment data")
+            return cache_data
+        else:
+            api_logger.info("Cache expired, fetching fresh data")
+    else:
+        api_logger.info("No cache found, fetching fresh data")
+    
+    # If we reach here, we need to scrape fresh data, sharing the scrape with concurrent requests
+    return await _refresh_assessments_once()
+
+async def fetch_shl_assessments_async():
+    """Async version of fetch_shl_assessments that properly handles async operations"""
+    cache_data = await _fetch_assessments_cache()
+    return cache_data.get('assessments', [])
 
 def fetch_shl_assessments():
     """Synchronous version to get cached assessments without scraping"""
     
     # If cache exists and is valid, return it
-    if CACHE_FILE.exists():
-        try:
-            with open(CACHE_FILE, 'r') as f:
-                cache_data = json.load(f)
-                
-            # Check if cache is still valid
-            timestamp = cache_data.get('timestamp', 0)
-            current_time = time.time()
-            
-            if current_time - timestamp < CACHE_EXPIRY:
-                api_logger.info("Using cached assessment data")
-                return cache_data.get('assessments', [])
-        except Exception as e:
-            api_logger.error(f"Error reading cache: {str(e)}")
+    cache_data = _get_assessments_cache()
+    if cache_data is not None:
+        # Check if cache is still valid
+        timestamp = cache_data.get('timestamp', 0)
+        current_time = time.time()
+        
+        if current_time - timestamp < CACHE_EXPIRY:
+            api_logger.info("Using cached assessment data")
+            return cache_data.get('assessments', [])
     
     # If no valid cache, return a minimal default set
     api_logger.warning("No valid cache found, returning default assessments")
@@ -421,8 +931,10 @@ async def recommend_assessments(query: QueryInput):
         try:
             # Use Firecrawl to extract text from the URL
             try:
-                result = await firecrawl_client.scrape_async(
-                    url=query.url,
+                # Job postings can be short; the near-empty retry is only meant for catalog pages
+                result = await _firecrawl_scrape(
+                    query.url,
+                    min_text=0,
                     extract_text=True
                 )
                 query_text = result.get("text", "")
@@ -432,15 +944,12 @@ async def recommend_assessments(query: QueryInput):
                 
             if not query_text:
                 # Fallback to traditional method if Firecrawl fails to extract text
-                response = requests.get(query.url)
+                response = await app.state.http.get(query.url)
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
                 
                 # Extract text from the webpage (remove scripts, styles, etc.)
-                for script in soup(["script", "style"]):
-                    script.extract()
-                
-                query_text = soup.get_text(separator=' ', strip=True)
+                loop = asyncio.get_running_loop()
+                query_text = await loop.run_in_executor(None, _extract_text, response.text)
         except Exception as e:
             api_logger.error(f"Failed to fetch or parse URL: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Failed to fetch or parse URL: {str(e)}")
@@ -453,9 +962,55 @@ async def recommend_assessments(query: QueryInput):
     api_logger.info(f"Returning {len(recommendations)} recommendations")
     return RecommendationResponse(recommendations=recommendations)
 
+# Recommendations keyed by query and assessment data version, so repeated queries skip Gemini
+REC_CACHE_TTL = 3600  # Cache expiry in seconds (1 hour)
+REC_CACHE_MAX_ENTRIES = 1024
+_rec_cache = {}
+_rec_cache_lock = asyncio.Lock()
+
+def _rec_cache_key(query_text: str, cache_data) -> str:
+    """Hash a query together with the timestamp of the assessment data it was answered from"""
+    version = cache_data.get('timestamp', 0)
+    return hashlib.sha256((query_text + str(version)).encode()).hexdigest()
+
+def _catalog_prompt_entries(cache_data):
+    """Return each assessment's serialized prompt entry, rebuilt only when the cache changes"""
+    timestamp = cache_data.get('timestamp', 0)
+    
+    if getattr(app.state, "catalog_prompt_timestamp", None) != timestamp:
+        app.state.catalog_prompt_entries = [
+            orjson.dumps({"id": i, "name": a["name"], "type": a["test_type"]})
+            for i, a in enumerate(cache_data.get('assessments', []))
+        ]
+        app.state.catalog_prompt_timestamp = timestamp
+    return app.state.catalog_prompt_entries
+
+# Structured output: Gemini emits just the ID array and stops, with no trailing explanation to generate or parse
+RECOMMENDATION_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema={"type": "array", "items": {"type": "integer"}}
+)
+
 async def get_recommendations_async(query_text: str) -> List[Assessment]:
-    # Fetch the assessment data
-    assessments_data = await fetch_shl_assessments_async()
+    # Take one snapshot of the assessment data; a concurrent refresh may swap the cache mid-request
+    cache_data = await _fetch_assessments_cache()
+    assessments_data = cache_data.get('assessments', [])
+    
+    # Serve repeated queries from the recommendation cache
+    cache_key = _rec_cache_key(query_text, cache_data)
+    async with _rec_cache_lock:
+        cached = _rec_cache.get(cache_key)
+    if cached and time.time() - cached[0] < REC_CACHE_TTL:
+        api_logger.info("Using cached recommendations")
+        return list(cached[1])
+    
+    # Recall the closest assessments by embedding so Gemini only reranks a short list
+    candidate_ids = await _retrieve_candidates(query_text, cache_data)
+    candidate_set = set(candidate_ids)
+    
+    # Splice the memoized catalog entries together instead of re-serializing them per request
+    entries = _catalog_prompt_entries(cache_data)
+    catalog_json = (b"[" + b",".join([entries[i] for i in candidate_ids]) + b"]").decode()
     
     # Prompt for Gemini to analyze the job description and recommend assessments
     prompt = f"""
@@ -467,36 +1022,33 @@ async def get_recommendations_async(query_text: str) -> List[Assessment]:
     
     Analyze the skills, experience, and requirements mentioned in the text. 
     Select at most 10 most relevant assessments from the SHL product catalog.
-    Return your answer as a list of assessment IDs ONLY, nothing else.
-    Choose from the following assessment IDs: {", ".join([str(i) for i in range(len(assessments_data))])}
+    Return your answer as a JSON array of assessment IDs ONLY, nothing else.
+    Choose from the following assessment IDs: {", ".join([str(i) for i in candidate_ids])}
     
     SHL Assessment List:
-    {json.dumps([{"id": i, "name": assessment["name"], "type": assessment["test_type"]} for i, assessment in enumerate(assessments_data)])}
+    {catalog_json}
     """
     
     # Get recommendations from Gemini
     try:
-        response = model.generate_content(prompt)
+        response = await _gemini_generate(prompt, generation_config=RECOMMENDATION_CONFIG)
         api_logger.debug("Received response from Gemini")
     except Exception as e:
         api_logger.error(f"Error getting recommendations from Gemini: {str(e)}")
         raise HTTPException(status_code=500, detail=f"AI model error: {str(e)}")
     
-    # Extract assessment IDs from the response
-    ids_text = response.text
-    ids = re.findall(r'\d+', ids_text)
-    
-    # Convert to integers and remove duplicates
+    # Parse the ID array and remove duplicates, keeping Gemini's ranking
     try:
-        unique_ids = list(set([int(id) for id in ids]))[:10]  # Limit to 10 recommendations
-    except ValueError:
+        ids = orjson.loads(response.text)
+        unique_ids = list(dict.fromkeys(int(id) for id in ids))[:10]  # Limit to 10 recommendations
+    except (ValueError, TypeError):
         api_logger.error("Failed to parse Gemini response")
         raise HTTPException(status_code=500, detail="Failed to parse Gemini response")
     
     # Fetch assessment details
     recommendations = []
     for id in unique_ids:
-        if 0 <= id < len(assessments_data):
+        if id in candidate_set:
             assessment = assessments_data[id]
             recommendations.append(Assessment(
                 name=assessment["name"],
@@ -508,7 +1060,15 @@ async def get_recommendations_async(query_text: str) -> List[Assessment]:
             ))
     
     api_logger.info(f"Generated {len(recommendations)} recommendations")
-    return recommendations
+    
+    async with _rec_cache_lock:
+        _rec_cache.pop(cache_key, None)
+        if len(_rec_cache) >= REC_CACHE_MAX_ENTRIES:
+            # Evict the oldest entry; dicts keep insertion order
+            _rec_cache.pop(next(iter(_rec_cache)))
+        _rec_cache[cache_key] = (time.time(), recommendations)
+    
+    return list(recommendations)
 
 @app.get("/health")
 async def health_check():
@@ -525,99 +1085,33 @@ async def get_assessments():
     return {"assessments": assessments}
 
 @app.get("/refresh-assessments")
-async def refresh_assessments(background_tasks: BackgroundTasks):
+async def refresh_assessments():
     """Force refresh the assessment data"""
     api_logger.info("Request to refresh assessment data")
     
-    # Clear the cache by deleting the file
-    if CACHE_FILE.exists():
-        CACHE_FILE.unlink()
-        api_logger.info("Deleted existing cache file")
+    # Scrape even if the cache is fresh; the file is overwritten in place rather than deleted,
+    # since it may be a bind mount that can't be unlinked
+    assessments = (await _refresh_assessments_once(force=True)).get('assessments', [])
     
-    # Fetch fresh assessment data (async-aware)
-    assessments = await scrape_shl_assessments()
-    
-    # Check for unnamed assessments
-    unnamed_count = sum(1 for assessment in assessments if assessment["name"] == "Unknown Product")
-    if unnamed_count > 0:
-        api_logger.warning(f"Found {unnamed_count} assessments with 'Unknown Product' as name")
-    
-    # Save to cache
-    cache_data = {
-        'timestamp': time.time(),
-        'assessments': assessments
-    }
-    
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache_data, f)
-    
-    # Start a background task to fix unnamed products in case there are any
-    if unnamed_count > 0:
-        background_tasks.add_task(fix_assessment_names)
+    # Recommendations made from the old data are no longer valid
+    async with _rec_cache_lock:
+        _rec_cache.clear()
     
     api_logger.info(f"Assessment data refreshed: {len(assessments)} assessments cached")
-    return {"status": "success", "count": len(assessments), "unnamed_count": unnamed_count}
-
-def fix_assessment_names():
-    """Utility to fix unnamed assessments in the cache file"""
-    cache_file = CACHE_FILE
-    
-    if not cache_file.exists():
-        app_logger.warning("Cache file not found for fixing names")
-        return
-    
-    # Load the existing cache
-    with open(cache_file, 'r') as f:
-        cache_data = json.load(f)
-    
-    assessments = cache_data.get('assessments', [])
-    unnamed_count = sum(1 for a in assessments if a.get("name") == "Unknown Product")
-    app_logger.info(f"Found {unnamed_count} assessments with 'Unknown Product' as name")
-    
-    # Process each assessment
-    for assessment in assessments:
-        if assessment.get("name") == "Unknown Product":
-            url = assessment.get("url", "")
-            
-            # Try to extract name from URL
-            url_parts = url.rstrip('/').split('/')
-            
-            # Get the last meaningful part of the URL
-            name = None
-            for part in reversed(url_parts):
-                if part and part not in ["", "solutions", "products", "assessments", "view"]:
-                    # Convert slug to readable name
-                    product_name = part.replace("-", " ").replace("%20", " ")
-                    # Clean up special characters and normalize spaces
-                    product_name = re.sub(r'[^\w\s]', ' ', product_name)
-                    product_name = re.sub(r'\s+', ' ', product_name).strip()
-                    name = product_name.title()
-                    break
-            
-            # Apply specific naming rules
-            if "personality" in url.lower():
-                name = name or "Personality Assessment"
-            elif "cognitive" in url.lower():
-                name = name or "Cognitive Assessment"
-            elif "video-interview" in url.lower():
-                name = name or "Video Interview"
-            elif "360" in url.lower():
-                name = name or "360 Feedback Assessment"
-            
-            # Final fallback
-            name = name or f"SHL Assessment - {assessment.get('test_type', 'General')}"
-            
-            app_logger.info(f"Renamed: 'Unknown Product' → '{name}' for URL: {url}")
-            assessment["name"] = name
-    
-    # Save the updated cache
-    with open(cache_file, 'w') as f:
-        json.dump(cache_data, f)
-    
-    fixed_count = unnamed_count - sum(1 for a in assessments if a.get("name") == "Unknown Product")
-    app_logger.info(f"Fixed {fixed_count} assessment names. Cache file updated.")
+    return {"status": "success", "count": len(assessments)}
 
 if __name__ == "__main__":
     app_logger.info("Starting FastAPI server")
     # uvicorn.run("main:app", host="localhost", port=8000, reload=True)
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    workers = int(os.getenv("API_WORKERS", "1"))
+    # Multiple workers need the app as an import string so each process can load it
+    uvicorn.run(
+        "main:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        timeout_keep_alive=75,
+        # "auto" picks uvloop and httptools (installed by uvicorn[standard]) and falls back when they're missing
+        loop="auto",
+        http="auto"
+    )